@@ -2,19 +2,44 @@ import streamlit as st
 st.set_option("client.showErrorDetails", False)
 from streamlit_folium import st_folium
 import folium
+import pydeck as pdk
 import geopandas as gpd
+import pandas as pd
+import numpy as np
+import shapely
 import tempfile
 import zipfile
 import io
+import json
+import hashlib
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import osmnx as ox
+from pyproj import CRS, Transformer
+
+try:
+    import dask
+    import dask_geopandas as dgpd
+except ImportError:
+    dgpd = None
 
 st.set_page_config(layout="wide", page_title="Buffer & Overlay Tool")
 
+# Layers with more features than this are snapped to a coarser grid before mapping
+DISPLAY_PRECISION_MIN_FEATURES = 10000
+DISPLAY_PRECISION_DEG = 1e-5
+# Display geometries are simplified to (map extent / this) degrees
+DISPLAY_SIMPLIFY_DIVISOR = 2000
+# Parcel layers at least this large are split across threads with dask-geopandas (if installed)
+DASK_MIN_FEATURES = 50000
+# Parcel layers at least this large are drawn with deck.gl (WebGL) instead of Folium/Leaflet
+WEBGL_MIN_PARCELS = 100000
+
 # ----------------- Helper Functions -----------------
 
 def read_vector_upload(uploaded_file):
-    """Robustly read an uploaded vector file (ZIP shapefile or GeoJSON). Returns GeoDataFrame in EPSG:32643."""
+    """Robustly read an uploaded vector file (ZIP shapefile or GeoJSON). Missing CRS defaults to EPSG:32643."""
     if uploaded_file is None:
         return None
 
@@ -32,14 +57,14 @@ def read_vector_upload(uploaded_file):
                 if not shp_files:
                     st.error("No .shp file found in uploaded ZIP.")
                     return None
-                gdf = gpd.read_file(shp_files[0])
+                gdf = gpd.read_file(shp_files[0], engine="pyogrio")
             except Exception as e:
                 st.error(f"Error reading shapefile ZIP: {e}")
                 return None
 
     elif name.endswith(".geojson") or name.endswith(".json"):
         try:
-            gdf = gpd.read_file(uploaded_file)
+            gdf = gpd.read_file(uploaded_file, engine="pyogrio")
         except Exception as e:
             st.error(f"Error reading GeoJSON: {e}")
             return None
@@ -49,63 +74,329 @@ def read_vector_upload(uploaded_file):
 
     if gdf.crs is None:
         gdf.set_crs(epsg=32643, inplace=True)
-    else:
-        gdf = gdf.to_crs(epsg=32643)
     return gdf
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _download_osm_roads(place_name, network_type):
+    """Download OSM road edges for a place (EPSG:4326). Cached for an hour; errors are not cached."""
+    G = ox.graph_from_place(place_name, network_type=network_type)
+    gdf_edges = ox.graph_to_gdfs(G, nodes=False, edges=True).reset_index(drop=True)
+    return gdf_edges
+
 def fetch_roads_from_place(place_name, network_type="all_private"):
-    """Fetch road network edges for a given place name (EPSG:32643)."""
+    """Fetch road network edges for a given place name (EPSG:4326)."""
     try:
-        G = ox.graph_from_place(place_name, network_type=network_type)
-        gdf_edges = ox.graph_to_gdfs(G, nodes=False, edges=True).reset_index(drop=True)
-        gdf_edges = gdf_edges.to_crs(epsg=32643)
-        return gdf_edges
+        return _download_osm_roads(place_name, network_type)
     except Exception as e:
         st.error(f"Error fetching OSM data: {e}")
         return None
 
-def ensure_utm(gdf):
-    """Project to metric CRS appropriate for centroid (UTM zone) for buffering."""
-    centroid = gdf.unary_union.centroid
-    lon, lat = centroid.x, centroid.y
-    utm_zone = int((lon + 180) / 6) + 1
-    epsg = 32600 + utm_zone if lat >= 0 else 32700 + utm_zone
+def find_geometry_columns(gdf):
+    """Names of geometry columns, by dtype; falls back to probing object columns with shapely."""
+    geom_cols = [c for c in gdf.columns if isinstance(gdf[c].dtype, gpd.array.GeometryDtype)]
+    if geom_cols:
+        return geom_cols
+    for c in gdf.columns:
+        if gdf[c].dtype != object:
+            continue
+        # pandas pads gaps with NaN, which shapely rejects; normalise them to None
+        values = gdf[c].where(gdf[c].notna(), None).to_numpy()
+        try:
+            # -1 for missing values; raises if any value is not a geometry
+            type_ids = shapely.get_type_id(values)
+        except TypeError:
+            continue
+        if (type_ids >= 0).any():
+            geom_cols.append(c)
+    return geom_cols
+
+def lonlat_bounds(gdf):
+    """Layer bounds as (min lon, min lat, max lon, max lat), transforming only the bbox."""
+    to_lonlat = Transformer.from_crs(gdf.crs, 4326, always_xy=True)
+    return to_lonlat.transform_bounds(*gdf.total_bounds)
+
+def utm_epsg_for(gdf):
+    """EPSG code of the UTM zone at the middle of the layer's bounds (EPSG:3857 if that fails)."""
     try:
-        gdf_m = gdf.to_crs(epsg=epsg)
-        return gdf_m, epsg
+        minx, miny, maxx, maxy = lonlat_bounds(gdf)
+        lon, lat = (minx + maxx) / 2, (miny + maxy) / 2
+        utm_zone = int((lon + 180) / 6) + 1
+        epsg = 32600 + utm_zone if lat >= 0 else 32700 + utm_zone
+        CRS.from_epsg(epsg)
+        return epsg
     except Exception:
-        gdf_m = gdf.to_crs(epsg=3857)
-        return gdf_m, 3857
-
-def make_buffer(roads_gdf, distance_m):
-    """Return buffer GeoDataFrame (EPSG:32643)."""
-    roads_m, epsg = ensure_utm(roads_gdf)
-    dissolved = roads_m.unary_union
-    buf = gpd.GeoSeries([dissolved.buffer(distance_m)], crs=roads_m.crs)
-    buf_gdf = gpd.GeoDataFrame({"geometry": buf})
-    buf_gdf = buf_gdf.to_crs(epsg=32643)
-    return buf_gdf
+        return 3857
+
+def gdf_cache_key(gdf):
+    """Content hash of a GeoDataFrame's geometry and CRS, used as a cache key."""
+    h = hashlib.sha1(str(gdf.crs).encode())
+    geoms = gdf.geometry.to_numpy()
+    # Null geometries have no WKB; hash them via the missing-value mask instead
+    h.update(shapely.is_missing(geoms).tobytes())
+    h.update(b"".join(w for w in shapely.to_wkb(geoms) if w is not None))
+    return h.hexdigest()
+
+def gdf_attributes_key(gdf):
+    """Hash of a GeoDataFrame's non-geometry columns and index, for caching exported files."""
+    h = hashlib.sha1()
+    attrs = gdf.drop(columns=gdf.geometry.name)
+    try:
+        attr_hash = pd.util.hash_pandas_object(attrs)
+    except TypeError:
+        # Unhashable cell values (e.g. lists in OSM/GeoJSON properties)
+        attr_hash = pd.util.hash_pandas_object(attrs.astype(str))
+    h.update(str(list(attrs.columns)).encode())
+    h.update(attr_hash.to_numpy().tobytes())
+    return h.hexdigest()
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def project_geometry(_gdf, gdf_key, epsg):
+    """Reproject a layer's geometry once per geometry hash (gdf_key) and target CRS."""
+    return _gdf.geometry.to_crs(epsg=epsg)
+
+def project_layer(gdf, gdf_key, epsg):
+    """Reproject a layer, reusing the cached geometry and keeping the caller's attributes."""
+    return gdf.set_geometry(project_geometry(gdf, gdf_key, epsg))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def make_buffers(_roads_gdf, roads_key, distances):
+    """Return one buffer GeoDataFrame per distance, in the given order and the roads' (metric) CRS."""
+    geoms = _roads_gdf.geometry.to_numpy()
+    # One distance per thread; shapely releases the GIL inside GEOS
+    workers = max(1, min(len(distances), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        dissolved = list(executor.map(partial(_dissolved_buffer, geoms), distances))
+    return [gpd.GeoDataFrame({"geometry": [b]}, crs=_roads_gdf.crs) for b in dissolved]
+
+def _dissolved_buffer(geoms, distance_m):
+    """Buffer each edge first (vectorized), then dissolve the small polygons into one."""
+    return shapely.union_all(shapely.buffer(geoms, distance_m, quad_segs=8))
+
+def strtree_intersects(parcels_gdf, buffer_gdf):
+    """Positions of parcels intersecting any buffer geometry, via a shapely STRtree query.
+
+    The tree is built on the parcels and queried with the buffer, so GEOS
+    prepares the (large) buffer geometry once and reuses it for every candidate.
+    """
+    tree = shapely.STRtree(parcels_gdf.geometry.to_numpy())
+    _, parcel_idx = tree.query(buffer_gdf.geometry.to_numpy(), predicate="intersects")
+    return np.unique(parcel_idx)
+
+def _intersects_mask(parcels_part, buffer_gdf):
+    """Boolean Series marking the parcels in one partition that intersect the buffer."""
+    mask = np.zeros(len(parcels_part), dtype=bool)
+    mask[strtree_intersects(parcels_part, buffer_gdf)] = True
+    return parcels_part.assign(hit=mask)["hit"]
 
 def count_intersecting_parcels(parcels_gdf, buffer_gdf):
-    """Count parcels that intersect buffer."""
-    intersects = parcels_gdf.geometry.intersects(buffer_gdf.unary_union)
-    return int(intersects.sum()), parcels_gdf[intersects]
-
-def save_gdf_as_shapefile_zipped(gdf, filename_prefix):
-    """Save GeoDataFrame as zipped shapefile and return bytes."""
+    """Count parcels that intersect buffer (spatial index + prepared buffer, no dissolve)."""
+    if dgpd is None or len(parcels_gdf) < DASK_MIN_FEATURES:
+        hits = parcels_gdf.iloc[strtree_intersects(parcels_gdf, buffer_gdf)]
+        return len(hits), hits
+    # Large layers: one partition per CPU on dask's threaded scheduler;
+    # GEOS releases the GIL, so threads parallelise without pickling
+    dparcels = dgpd.from_geopandas(parcels_gdf[["geometry"]].reset_index(drop=True), npartitions=os.cpu_count() or 1)
+    with dask.config.set(scheduler="threads"):
+        mask = dparcels.map_partitions(_intersects_mask, buffer_gdf, meta=("hit", bool)).compute()
+    hits = parcels_gdf[mask.to_numpy()]
+    return len(hits), hits
+
+def count_nested_intersections(parcels_gdf, buffer_gdfs):
+    """Count parcels intersecting each buffer, for buffers sorted by ascending distance.
+
+    Buffers are nested, so parcels matched by a smaller buffer are carried
+    forward and only the still-unmatched parcels are tested against the next one.
+    Returns a list of (count, intersecting parcels) in the same order as buffer_gdfs.
+    """
+    matched = np.zeros(len(parcels_gdf), dtype=bool)
+    # Parcels whose bounding box misses the largest buffer's envelope cannot
+    # match any buffer, so drop them up front with a vectorized bbox test
+    unreachable = np.zeros(len(parcels_gdf), dtype=bool)
+    if buffer_gdfs:
+        minx, miny, maxx, maxy = buffer_gdfs[-1].total_bounds
+        bounds = shapely.bounds(parcels_gdf.geometry.to_numpy())
+        unreachable = ~(
+            (bounds[:, 0] <= maxx) & (bounds[:, 2] >= minx) & (bounds[:, 1] <= maxy) & (bounds[:, 3] >= miny)
+        )
+    results = []
+    for buf_gdf in buffer_gdfs:
+        todo = np.flatnonzero(~(matched | unreachable))
+        if len(todo):
+            _, hits = count_intersecting_parcels(parcels_gdf.iloc[todo].reset_index(drop=True), buf_gdf)
+            matched[todo[hits.index.to_numpy()]] = True
+        results.append((int(matched.sum()), parcels_gdf[matched]))
+    return results
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def save_gdf_as_shapefile_zipped(_gdf, filename_prefix, cache_key):
+    """Save GeoDataFrame as zipped shapefile and return bytes. Cached per (filename_prefix, cache_key)."""
     with tempfile.TemporaryDirectory() as tmpdir:
         shp_path = os.path.join(tmpdir, f"{filename_prefix}.shp")
-        gdf.to_file(shp_path, driver="ESRI Shapefile")
+        _gdf.to_file(shp_path, driver="ESRI Shapefile", engine="pyogrio")
         zip_buffer = io.BytesIO()
         with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
             for f in os.listdir(tmpdir):
                 zf.write(os.path.join(tmpdir, f), arcname=f)
-        zip_buffer.seek(0)
-        return zip_buffer.read()
+        return zip_buffer.getvalue()
+
+def to_display(gdf, transformer, tolerance=0.0):
+    """Geometry-only copy of a layer in EPSG:4326 for Folium, simplified to `tolerance` degrees.
+
+    `transformer` maps the layer's CRS to EPSG:4326 (always_xy) and is shared
+    across layers. Attribute columns are dropped to keep the GeoJSON small;
+    large layers are additionally snapped to ~1 m precision.
+    """
+    geoms = shapely.transform(
+        gdf.geometry.to_numpy(), lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1]))
+    )
+    disp = gpd.GeoDataFrame(geometry=geoms, index=gdf.index, crs=4326)
+    if tolerance > 0:
+        disp["geometry"] = shapely.simplify(disp.geometry.values, tolerance, preserve_topology=True)
+    if len(disp) > DISPLAY_PRECISION_MIN_FEATURES:
+        disp["geometry"] = shapely.set_precision(disp.geometry.values, DISPLAY_PRECISION_DEG)
+    return disp
 
 def folium_style(feature, color="#3388ff", weight=2, fill=False):
     return {"color": color, "weight": weight, "fill": fill, "fillOpacity": 0.5}
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def display_layers(_parcels_gdf, _roads_gdf, _results, map_key, simplify_tol):
+    """Map-ready (EPSG:4326, simplified) copies of all layers, cached per result set (map_key).
+
+    Returns (parcels, roads, [(distance_m, buffer, intersections), ...]). Served as
+    per-call copies, so the Folium map built from them is never shared between sessions.
+    """
+    # All inputs share one projected CRS, so one transformer serves every layer
+    transformer = Transformer.from_crs(_parcels_gdf.crs, 4326, always_xy=True)
+    results = [
+        (
+            r["distance_m"],
+            to_display(r["buffer"], transformer, simplify_tol),
+            to_display(r["intersections"], transformer, simplify_tol),
+        )
+        for r in _results
+    ]
+    return (
+        to_display(_parcels_gdf, transformer, simplify_tol),
+        to_display(_roads_gdf, transformer, simplify_tol),
+        results,
+    )
+
+def build_map(layers, center, selected_buffer):
+    """Build the Folium map from display_layers() output."""
+    parcels_display, roads_display, results_display = layers
+    m = folium.Map(location=center, zoom_start=13, control_scale=True, tiles="OpenStreetMap")
+
+    # Add alternative tiles
+    folium.TileLayer(
+        tiles="CartoDB positron",
+        name="Carto Light",
+        attr="© OpenStreetMap contributors © CARTO",
+    ).add_to(m)
+
+    folium.TileLayer(
+        tiles="Stamen Terrain",
+        name="Terrain",
+        attr="Map tiles by Stamen Design, under CC BY 3.0 — Data © OpenStreetMap contributors",
+    ).add_to(m)
+
+    folium.TileLayer(
+        tiles="Stamen Toner",
+        name="Toner",
+        attr="Map tiles by Stamen Design, under CC BY 3.0 — Data © OpenStreetMap contributors",
+    ).add_to(m)
+
+    if not parcels_display.empty:
+        folium.GeoJson(
+            parcels_display,
+            name="Parcels",
+            style_function=lambda feat: {"color": "#800026", "weight": 1, "fill": True, "fillOpacity": 0.4},
+        ).add_to(folium.FeatureGroup(name="Parcels", show=True).add_to(m))
+
+    if not roads_display.empty:
+        folium.GeoJson(
+            roads_display,
+            name="Roads",
+            style_function=lambda feat: {"color": "#08519c", "weight": 2},
+        ).add_to(folium.FeatureGroup(name="Roads", show=True).add_to(m))
+
+    # Buffers and intersections
+    for dist, buf_disp, inter_disp in results_display:
+        folium.GeoJson(
+            buf_disp,
+            name=f"Buffer {dist} m",
+            style_function=lambda feat: folium_style(feat, color="#FEB24C", weight=1, fill=True),
+        ).add_to(folium.FeatureGroup(name=f"Buffer {dist} m", show=(dist == selected_buffer)).add_to(m))
+
+        if not inter_disp.empty:
+            folium.GeoJson(
+                inter_disp,
+                name=f"Intersection {dist} m",
+                style_function=lambda feat: folium_style(feat, color="#238b45", weight=1, fill=True),
+            ).add_to(folium.FeatureGroup(name=f"Intersection {dist} m", show=(dist == selected_buffer)).add_to(m))
+
+    folium.LayerControl().add_to(m)
+    return m
+
+class CompactDeck(pdk.Deck):
+    """pydeck Deck serialised without indentation (pydeck's indent=2 roughly triples inline coordinates)."""
+
+    def to_json(self):
+        # Re-encode pydeck's public output rather than depending on its serializer internals
+        return json.dumps(json.loads(super().to_json()), separators=(",", ":"))
+
+def polygon_records(gdf):
+    """Rings of each polygon part as [{"polygon": [exterior, *holes]}] records for a pydeck PolygonLayer."""
+    geoms = gdf.geometry.to_numpy()
+    geoms = geoms[~(shapely.is_missing(geoms) | shapely.is_empty(geoms))]
+    if not len(geoms):
+        return []
+    # Flat coordinates plus ring/part offsets, built in C rather than per polygon
+    geom_type, coords, offsets = shapely.to_ragged_array(geoms)
+    ring_offsets, part_offsets = offsets[0].tolist(), offsets[1].tolist()
+    points = coords.tolist()
+    rings = [points[a:b] for a, b in zip(ring_offsets[:-1], ring_offsets[1:])]
+    return [{"polygon": rings[a:b]} for a, b in zip(part_offsets[:-1], part_offsets[1:]) if b > a]
+
+# Each entry holds every layer's coordinates, so keep only a few
+@st.cache_resource(show_spinner=False, max_entries=4)
+def build_deck(_parcels_gdf, _roads_gdf, _results, map_key, center, simplify_tol, selected_buffer):
+    """Build a pydeck (deck.gl, WebGL) map for parcel layers too large for Leaflet GeoJSON.
+
+    Polygon layers are sent as bare coordinate rings rather than GeoJSON features,
+    and the spec is serialised compactly. deck.gl has no layer switcher, so only
+    the selected buffer and its intersections are drawn.
+    """
+    transformer = Transformer.from_crs(_parcels_gdf.crs, 4326, always_xy=True)
+
+    def vector_layer(gdf, layer_id, line_color, fill_color=None, line_width=1):
+        disp = to_display(gdf, transformer, simplify_tol)
+        style = dict(
+            id=layer_id,
+            stroked=True,
+            filled=fill_color is not None,
+            get_line_color=line_color,
+            get_fill_color=fill_color or [0, 0, 0, 0],
+            line_width_min_pixels=line_width,
+        )
+        if disp.geom_type.dropna().isin(["Polygon", "MultiPolygon"]).all():
+            return pdk.Layer("PolygonLayer", polygon_records(disp), get_polygon="polygon", **style)
+        return pdk.Layer("GeoJsonLayer", disp.__geo_interface__, **style)
+
+    layers = [
+        vector_layer(_parcels_gdf, "parcels", [128, 0, 38], [128, 0, 38, 100]),
+        vector_layer(_roads_gdf, "roads", [8, 81, 156], line_width=2),
+    ]
+    for r in _results:
+        if r["distance_m"] != selected_buffer:
+            continue
+        layers.append(vector_layer(r["buffer"], "buffer", [254, 178, 76], [254, 178, 76, 128]))
+        if not r["intersections"].empty:
+            layers.append(vector_layer(r["intersections"], "intersections", [35, 139, 69], [35, 139, 69, 128]))
+
+    view = pdk.ViewState(latitude=center[0], longitude=center[1], zoom=13)
+    return CompactDeck(layers=layers, initial_view_state=view, map_provider="carto", map_style="light")
+
 # ----------------- Streamlit Interface -----------------
 
 st.title("Buffer Zone & Overlay Analysis")
@@ -145,7 +436,9 @@ with col1:
                 st.error("Please enter a place name.")
             else:
                 with st.spinner("Fetching roads from OSM..."):
-                    roads_gdf = fetch_roads_from_place(place_name)
+                    st.session_state["roads_gdf"] = fetch_roads_from_place(place_name)
+        # Keep fetched roads across reruns (e.g. when "Run" is clicked)
+        roads_gdf = st.session_state.get("roads_gdf")
 
     st.markdown("---")
     st.write("Buffer options (meters)")
@@ -183,7 +476,7 @@ if run_button:
     for name, gdf in [("roads", roads_gdf), ("parcels", parcels_gdf)]:
         if gdf is not None:
             if "geometry" not in gdf.columns:
-                geom_col = [c for c in gdf.columns if gdf[c].apply(lambda x: hasattr(x, "geom_type")).any()]
+                geom_col = find_geometry_columns(gdf)
                 if geom_col:
                     gdf.rename(columns={geom_col[0]: "geometry"}, inplace=True)
                 else:
@@ -192,89 +485,42 @@ if run_button:
             if not isinstance(gdf, gpd.GeoDataFrame):
                 gdf = gpd.GeoDataFrame(gdf, geometry="geometry", crs="EPSG:32643")
 
-    roads_gdf = roads_gdf.to_crs(epsg=32643)
-    parcels_gdf = parcels_gdf.to_crs(epsg=32643)
+    # Pick one metric CRS and project each layer into it once; only display layers go to 4326
+    utm_epsg = utm_epsg_for(parcels_gdf if not parcels_gdf.empty else roads_gdf)
+    roads_key = gdf_cache_key(roads_gdf)
+    parcels_key = gdf_cache_key(parcels_gdf)
+    roads_gdf = project_layer(roads_gdf, roads_key, utm_epsg)
+    parcels_gdf = project_layer(parcels_gdf, parcels_key, utm_epsg)
 
     # Compute map center
     try:
-        display_ref = (
-            parcels_gdf.to_crs(epsg=4326)
-            if parcels_gdf is not None and not parcels_gdf.empty
-            else roads_gdf.to_crs(epsg=4326)
-        )
-        minx, miny, maxx, maxy = display_ref.total_bounds
+        display_ref = parcels_gdf if parcels_gdf is not None and not parcels_gdf.empty else roads_gdf
+        minx, miny, maxx, maxy = lonlat_bounds(display_ref)
         center = [(miny + maxy) / 2, (minx + maxx) / 2]
+        simplify_tol = max(maxx - minx, maxy - miny) / DISPLAY_SIMPLIFY_DIVISOR
     except Exception:
         center = [20.5937, 78.9629]
-
-    # Create folium map
-    m = folium.Map(location=center, zoom_start=13, control_scale=True, tiles="OpenStreetMap")
-
-    # Add alternative tiles
-    folium.TileLayer(
-        tiles="CartoDB positron",
-        name="Carto Light",
-        attr="© OpenStreetMap contributors © CARTO",
-    ).add_to(m)
-
-    folium.TileLayer(
-        tiles="Stamen Terrain",
-        name="Terrain",
-        attr="Map tiles by Stamen Design, under CC BY 3.0 — Data © OpenStreetMap contributors",
-    ).add_to(m)
-
-    folium.TileLayer(
-        tiles="Stamen Toner",
-        name="Toner",
-        attr="Map tiles by Stamen Design, under CC BY 3.0 — Data © OpenStreetMap contributors",
-    ).add_to(m)
-
-    # Display layers
-    parcels_display = parcels_gdf.to_crs(epsg=4326)
-    roads_display = roads_gdf.to_crs(epsg=4326)
-
-    if not parcels_display.empty:
-        folium.GeoJson(
-            parcels_display.to_json(),
-            name="Parcels",
-            style_function=lambda feat: {"color": "#800026", "weight": 1, "fill": True, "fillOpacity": 0.4},
-        ).add_to(folium.FeatureGroup(name="Parcels", show=True).add_to(m))
-
-    if not roads_display.empty:
-        folium.GeoJson(
-            roads_display.to_json(),
-            name="Roads",
-            style_function=lambda feat: {"color": "#08519c", "weight": 2},
-        ).add_to(folium.FeatureGroup(name="Roads", show=True).add_to(m))
+        simplify_tol = 0.0
 
     # Buffers and intersections
     results = []
-    for dist in multi_select_buffers:
-        buf_gdf = make_buffer(roads_gdf, dist)
-        count, intersect_gdf = count_intersecting_parcels(parcels_gdf, buf_gdf)
+    dists = sorted(multi_select_buffers)
+    buf_gdfs = make_buffers(roads_gdf, (roads_key, utm_epsg), tuple(dists))
+    matches = count_nested_intersections(parcels_gdf, buf_gdfs)
+    for dist, buf_gdf, (count, intersect_gdf) in zip(dists, buf_gdfs, matches):
         results.append({"distance_m": dist, "buffer": buf_gdf, "intersections": intersect_gdf, "count": count})
 
-        buf_disp = buf_gdf.to_crs(epsg=4326)
-        inter_disp = intersect_gdf.to_crs(epsg=4326)
-
-        folium.GeoJson(
-            buf_disp.to_json(),
-            name=f"Buffer {dist} m",
-            style_function=lambda feat: folium_style(feat, color="#FEB24C", weight=1, fill=True),
-        ).add_to(folium.FeatureGroup(name=f"Buffer {dist} m", show=(dist == selected_buffer)).add_to(m))
-
-        if not inter_disp.empty:
-            folium.GeoJson(
-                inter_disp.to_json(),
-                name=f"Intersection {dist} m",
-                style_function=lambda feat: folium_style(feat, color="#238b45", weight=1, fill=True),
-            ).add_to(folium.FeatureGroup(name=f"Intersection {dist} m", show=(dist == selected_buffer)).add_to(m))
-
-    folium.LayerControl().add_to(m)
+    map_key = (parcels_key, roads_key, utm_epsg, tuple(dists))
     st.subheader("Interactive map")
 
     with st.spinner("Rendering interactive map..."):
-        st_data = st_folium(m, width=900, height=600, key="main_map", returned_objects=[])
+        if len(parcels_gdf) >= WEBGL_MIN_PARCELS:
+            # Too many parcels for Leaflet to hold as GeoJSON; draw them with deck.gl instead
+            st.pydeck_chart(build_deck(parcels_gdf, roads_gdf, results, map_key, center, simplify_tol, selected_buffer))
+        else:
+            layers = display_layers(parcels_gdf, roads_gdf, results, map_key, simplify_tol)
+            m = build_map(layers, center, selected_buffer)
+            st_data = st_folium(m, width=900, height=600, key="main_map", returned_objects=[])
 
     st.subheader("Results")
     for r in results:
@@ -282,7 +528,7 @@ if run_button:
         colA, colB = st.columns(2)
         with colA:
             if not r["buffer"].empty:
-                shp_bytes = save_gdf_as_shapefile_zipped(r["buffer"], f"buffer_{r['distance_m']}m")
+                shp_bytes = save_gdf_as_shapefile_zipped(r["buffer"], f"buffer_{r['distance_m']}m", map_key)
                 st.download_button(
                     label=f"Download buffer {r['distance_m']}m (shapefile .zip)",
                     data=shp_bytes,
@@ -290,7 +536,9 @@ if run_button:
                 )
         with colB:
             if not r["intersections"].empty:
-                shp_bytes = save_gdf_as_shapefile_zipped(r["intersections"], f"intersection_{r['distance_m']}m")
+                # Exported parcels carry their attributes, which map_key (geometry only) does not cover
+                export_key = (map_key, gdf_attributes_key(r["intersections"]))
+                shp_bytes = save_gdf_as_shapefile_zipped(r["intersections"], f"intersection_{r['distance_m']}m", export_key)
                 st.download_button(
                     label=f"Download intersection {r['distance_m']}m (shapefile .zip)",
                     data=shp_bytes,